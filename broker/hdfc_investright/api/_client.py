@@ -0,0 +1,274 @@
+"""
+HDFC Investright shared async HTTP client
+Provides a single pooled httpx.AsyncClient for all broker REST calls
+
+The blocking entry points run every request on one background event loop
+(see run_sync), which owns the long-lived client. Code that awaits the
+*_async coroutines on a loop of its own gets a separate client for that
+loop and must await close_async_client() before the loop shuts down.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import socket
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+import httpx
+
+from broker.hdfc_investright.api.baseurl import BASE_URL
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Static headers sent with every request; Authorization is passed per request
+_HEADERS_TEMPLATE = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+# Small, bursty order/quote RPCs: disable Nagle so POSTs are not held back,
+# keep idle connections alive, and give the send buffer room for a burst
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    (socket.SOL_SOCKET, socket.SO_SNDBUF, 32 * 1024),
+]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+
+_LIMITS = httpx.Limits(
+    max_keepalive_connections=8,
+    max_connections=16,
+    keepalive_expiry=60.0
+)
+
+# Multiplex concurrent calls over one TLS connection with HTTP/2. ALPN falls
+# back to HTTP/1.1 if the server does not offer h2. Disabled in standalone
+# (Docker) mode, matching utils.httpx_client.
+_HTTP2_ENABLED = os.environ.get("APP_MODE", "integrated").strip().strip("'\"") != "standalone"
+
+# Pooled connections, locks and futures are bound to the event loop that
+# created them, so each running loop gets its own set (see loop_local)
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+_loop_state_lock = threading.Lock()
+
+# Background event loop that runs the blocking entry points' coroutines
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+# Request timeout, matching utils.httpx_client for large historical data requests
+_REQUEST_TIMEOUT = 120.0
+
+# Upper bound on how long a blocking entry point waits for its coroutine;
+# above _REQUEST_TIMEOUT so a slow request fails in httpx first
+_SYNC_TIMEOUT = 150.0
+
+# Durations (ms) of broker responses received for the current blocking call,
+# handed back to the caller's thread for utils.latency_monitor
+_api_times: ContextVar[Optional[List[float]]] = ContextVar("hdfc_api_times", default=None)
+
+
+def loop_local(name: str, factory: Callable[[], Any]) -> Any:
+    """
+    Return the object stored under name for the running event loop
+
+    The object is created with factory() the first time a loop asks for it.
+    Use this for anything bound to a loop (AsyncClient, Lock, Semaphore,
+    Future maps) so coroutines can be driven from any loop, including
+    repeated asyncio.run() calls, without "bound to a different event
+    loop" errors. State is dropped when its loop is garbage collected, but
+    nothing is closed: a per-loop AsyncClient keeps its sockets open until
+    close_async_client() is awaited on that loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _loop_state_lock:
+        state = _loop_state.get(loop)
+        if state is None:
+            state = _loop_state[loop] = {}
+        obj = state.get(name)
+        if obj is None:
+            obj = state[name] = factory()
+    return obj
+
+
+async def _log_request(request: httpx.Request) -> None:
+    """Hook called before request is sent"""
+    request.extensions["start_time"] = time.time()
+
+
+async def _log_response(response: httpx.Response) -> None:
+    """Hook called after response is received"""
+    start_time = response.request.extensions.get("start_time")
+    api_times = _api_times.get()
+    if start_time and api_times is not None:
+        api_times.append((time.time() - start_time) * 1000)
+
+
+def _record_api_time(api_times: List[float]) -> None:
+    """Store the broker API time in Flask's g object for latency tracking"""
+    if not api_times:
+        return
+    try:
+        from flask import g, has_request_context
+        
+        if has_request_context() and hasattr(g, "latency_tracker"):
+            g.broker_api_time = api_times[-1]
+            logger.debug(f"Broker API call took {api_times[-1]:.2f}ms")
+    except (ImportError, RuntimeError, AttributeError):
+        # Not in Flask request context or g not available
+        pass
+
+
+def _create_client() -> httpx.AsyncClient:
+    """Build the AsyncClient used by one event loop"""
+    transport = httpx.AsyncHTTPTransport(
+        http1=True,
+        http2=_HTTP2_ENABLED,
+        limits=_LIMITS,
+        socket_options=_SOCKET_OPTIONS
+    )
+    client = httpx.AsyncClient(
+        base_url=BASE_URL,
+        transport=transport,
+        headers=_HEADERS_TEMPLATE,
+        timeout=_REQUEST_TIMEOUT,
+        event_hooks={"request": [_log_request], "response": [_log_response]}
+    )
+    logger.info(
+        f"Created HDFC Investright async HTTP client (HTTP/2 {'enabled' if _HTTP2_ENABLED else 'disabled'})"
+    )
+    return client
+
+
+async def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the HDFC AsyncClient for the running event loop
+    
+    The client is created on first use per loop with base_url set, so
+    callers pass endpoint paths (e.g. "/orders") and keep-alive
+    connections are reused. The client carries no Authorization header;
+    pass auth_headers(token) on each request.
+    
+    Outside the background loop used by run_sync, the caller owns the
+    client and must await close_async_client() before its loop shuts
+    down (e.g. at the end of the coroutine given to asyncio.run()).
+    """
+    return loop_local("client", _create_client)
+
+
+@lru_cache(maxsize=8)
+def auth_headers(token: str) -> Dict[str, str]:
+    """
+    Return the per-request Authorization header for an access token
+    
+    Cached per token so hot paths do not rebuild the dict. Treat the
+    result as read-only.
+    """
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def preconnect() -> None:
+    """
+    Open a pooled connection ahead of the first trading call
+
+    Issues a HEAD to /account/profile so the TCP/TLS handshake (and
+    HTTP/2 negotiation) is paid before an order needs the connection.
+    Failures are only logged.
+    """
+    try:
+        client = await get_async_client()
+        response = await client.head("/account/profile")
+        logger.info(f"HDFC Investright connection ready using {response.http_version}")
+    except Exception as e:
+        logger.warning(f"HDFC Investright preconnect failed: {str(e)}")
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start the background event loop thread on first use"""
+    global _loop
+
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="hdfc-investright-loop",
+                    daemon=True
+                )
+                thread.start()
+                _loop = loop
+
+    return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, Any], timeout: float = _SYNC_TIMEOUT) -> Any:
+    """
+    Run a coroutine from synchronous code and return its result
+
+    Backs the blocking entry points in auth_api/order_api/data_api that
+    the OpenAlgo framework calls (get_order_book, place_order, ...). The
+    coroutine runs on a background loop thread so callers that already
+    have a running loop of their own (e.g. eventlet) can still use it.
+    Broker response times are recorded in Flask's g for latency tracking,
+    as utils.httpx_client does.
+
+    Raises:
+        RuntimeError: If called from the background loop itself, where
+                      blocking on the result would deadlock
+        concurrent.futures.TimeoutError: If no result arrives in timeout
+    """
+    loop = _get_loop()
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if running is loop:
+        coro.close()
+        raise RuntimeError(
+            "HDFC Investright blocking call made from the broker event loop; await the *_async coroutine instead"
+        )
+
+    # The coroutine runs on the loop thread, away from Flask's g; collect
+    # response timings there and record them on this thread afterwards
+    api_times: List[float] = []
+    
+    async def timed() -> Any:
+        _api_times.set(api_times)
+        return await coro
+    
+    future = asyncio.run_coroutine_threadsafe(timed(), loop)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+    finally:
+        _record_api_time(api_times)
+
+
+async def close_async_client() -> None:
+    """
+    Close the running loop's client and release its pooled connections
+    
+    Required before shutting down any loop other than the background loop,
+    which keeps its client for the life of the process.
+    """
+    loop = asyncio.get_running_loop()
+    with _loop_state_lock:
+        state = _loop_state.get(loop)
+        client = state.pop("client", None) if state else None
+
+    if client is not None:
+        await client.aclose()
+        logger.info("Closed HDFC Investright async HTTP client")
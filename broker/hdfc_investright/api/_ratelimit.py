@@ -0,0 +1,110 @@
+"""
+HDFC Investright client-side rate limiting
+Token buckets that shape outgoing REST calls below the broker's limits
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from limits import parse
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket limiter usable as an async context manager
+
+    Allows a sustained `rate` acquisitions per second with bursts of up to
+    `capacity`. Each caller reserves its token immediately (the balance may
+    go negative) and sleeps off the deficit, so callers are released in
+    arrival order. State is guarded by a threading lock rather than an
+    asyncio one, so a single bucket can be shared by every event loop.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        if capacity is None:
+            capacity = max(1.0, rate)
+        if capacity < 1:
+            raise ValueError(f"Token bucket capacity must be at least 1, got {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def _parse_rate(value: str) -> float:
+    """Convert a rate limit string into acquisitions per second"""
+    item = parse(value)
+    if item.amount <= 0:
+        raise ValueError(f"rate must allow at least one request, got {item}")
+    return item.amount / item.get_expiry()
+
+
+def _rate_from_env(name: str, default: str) -> float:
+    """
+    Parse a rate limit setting into acquisitions per second
+    
+    Accepts the same strings as the app's Flask-Limiter settings, e.g.
+    "8 per second", "100 per minute" or "8/second". An invalid setting is
+    logged and replaced by the default so the broker still loads.
+    """
+    value = os.getenv(name, default)
+    try:
+        return _parse_rate(value)
+    except ValueError as e:
+        logger.warning(f"Invalid {name} {value!r} ({str(e)}); using {default!r}")
+        return _parse_rate(default)
+
+
+def _burst_from_env(name: str, rate: float) -> float:
+    """Read a burst size setting, defaulting to one second's worth of tokens"""
+    default = max(1.0, rate)
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        burst = float(value)
+    except ValueError:
+        burst = 0.0
+    if burst < 1:
+        logger.warning(f"{name} must be a number of at least 1, got {value!r}; using {default:g}")
+        return default
+    return burst
+
+
+def _bucket_from_env(rate_name: str, burst_name: str, default: str) -> AsyncTokenBucket:
+    """Build a bucket from a rate setting and an optional burst setting"""
+    rate = _rate_from_env(rate_name, default)
+    return AsyncTokenBucket(rate, _burst_from_env(burst_name, rate))
+
+
+# Order and market data endpoints are limited separately by the broker
+order_limiter = _bucket_from_env("HDFC_ORDER_RATE_LIMIT", "HDFC_ORDER_RATE_BURST", "8 per second")
+data_limiter = _bucket_from_env("HDFC_DATA_RATE_LIMIT", "HDFC_DATA_RATE_BURST", "10 per second")
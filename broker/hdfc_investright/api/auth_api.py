@@ -3,22 +3,201 @@ HDFC Investright Authentication Handler
 Implements OAuth 2.0 token management for OpenAlgo
 """
 
-import json
-import logging
+import asyncio
 import os
-from datetime import datetime, timedelta
+import time
+from dataclasses import dataclass
 from typing import Optional, Dict
 
 import httpx
-from requests.auth import HTTPBasicAuth
 
-from utils.httpx_client import get_httpx_client
+from broker.hdfc_investright.api._client import (
+    get_async_client,
+    loop_local,
+    preconnect,
+    run_sync,
+)
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 AUTH_BASE_URL = "https://developer.hdfcsec.com"
 
+# Broker credentials, read from the environment once on first use
+_ENV: Optional[Dict[str, str]] = None
+_BASIC_AUTH: Optional[httpx.BasicAuth] = None
+
+# The shared client defaults to JSON; token requests are form-encoded
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def _refresh_ratio() -> float:
+    """Read BROKER_REFRESH_RATIO, falling back to 0.5 unless it lies in (0, 1)"""
+    value = os.getenv("BROKER_REFRESH_RATIO", "0.5")
+    try:
+        ratio = float(value)
+    except ValueError:
+        ratio = 0.0
+    if not 0 < ratio < 1:
+        logger.warning(f"BROKER_REFRESH_RATIO must be between 0 and 1, got {value!r}; using 0.5")
+        return 0.5
+    return ratio
+
+
+# Fraction of the access token lifetime after which it is refreshed
+TOKEN_REFRESH_RATIO = _refresh_ratio()
+
+# Backoff between failed refresh attempts (seconds), doubling up to the cap
+REFRESH_RETRY_BASE = 5.0
+REFRESH_RETRY_MAX = 300.0
+
+
+@dataclass
+class TokenEntry:
+    """Cached OAuth tokens with absolute (epoch seconds) expiry times"""
+    access_token: str
+    refresh_token: str
+    expires_at: float
+    issued_at: float
+    refresh_expires_at: Optional[float] = None
+    # Earliest time to retry after a failed refresh
+    retry_at: float = 0.0
+    refresh_failures: int = 0
+    
+    @property
+    def refresh_at(self) -> float:
+        """Time after which the access token should be refreshed"""
+        return self.issued_at + (self.expires_at - self.issued_at) * TOKEN_REFRESH_RATIO
+
+
+# In-process token cache keyed by BROKER_API_KEY
+_TOKEN_CACHE: Dict[str, TokenEntry] = {}
+
+# Whether _TOKEN_CACHE has been loaded from the token store yet
+_hydrated = False
+
+# Keeps background preconnect tasks referenced until they finish
+_background_tasks = set()
+
+
+def _refresh_lock() -> asyncio.Lock:
+    """Per-loop lock serialising refreshes so concurrent expiry triggers a single token POST"""
+    return loop_local("auth_refresh_lock", asyncio.Lock)
+
+
+async def _store_token(api_key: str, token_response: Dict) -> None:
+    """Cache a token response, converting relative expires_in to absolute time"""
+    now = time.time()
+    
+    access_token = token_response.get("access_token")
+    if not access_token:
+        return
+    
+    previous = _TOKEN_CACHE.get(api_key)
+    # Refresh responses may omit the refresh token when it is not rotated
+    refresh_token = token_response.get("refresh_token") or (previous.refresh_token if previous else "")
+    
+    # The entry lives as long as the refresh token; the access token expiry
+    # only decides when to refresh
+    refresh_expires_at = previous.refresh_expires_at if previous else None
+    if token_response.get("refresh_expires_in"):
+        refresh_expires_at = now + float(token_response["refresh_expires_in"])
+    
+    entry = TokenEntry(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_at=now + float(token_response.get("expires_in", 0)),
+        issued_at=now,
+        refresh_expires_at=refresh_expires_at
+    )
+    _TOKEN_CACHE[api_key] = entry
+    
+    # The token store commits synchronously; keep it off the event loop
+    await asyncio.to_thread(_persist_token, api_key, entry)
+
+
+def _persist_token(api_key: str, entry: TokenEntry) -> None:
+    """Write a cache entry to the token store so it survives restarts"""
+    try:
+        from broker.hdfc_investright.database.token_store import save_token
+        
+        save_token(
+            api_key,
+            entry.access_token,
+            entry.refresh_token,
+            entry.expires_at,
+            entry.issued_at,
+            entry.refresh_expires_at
+        )
+    except Exception as e:
+        logger.warning(f"Could not persist HDFC token: {str(e)}")
+
+
+def _load_tokens() -> Dict[str, TokenEntry]:
+    """Read unexpired entries from the token store"""
+    try:
+        from broker.hdfc_investright.database.token_store import load_tokens
+        
+        stored = load_tokens()
+    except Exception as e:
+        logger.warning(f"Could not load persisted HDFC tokens: {str(e)}")
+        return {}
+    
+    now = time.time()
+    entries = {}
+    for api_key, fields in stored.items():
+        refresh_expires_at = fields.get("refresh_expires_at")
+        if refresh_expires_at is not None and now >= refresh_expires_at:
+            continue
+        entries[api_key] = TokenEntry(**fields)
+    return entries
+
+
+async def _hydrate() -> None:
+    """Restore tokens persisted by a previous process, once, on first use"""
+    global _hydrated
+    
+    async with _refresh_lock():
+        if _hydrated:
+            return
+        
+        entries = await asyncio.to_thread(_load_tokens)
+        # Tokens obtained in this process are newer than anything stored
+        for api_key, entry in entries.items():
+            _TOKEN_CACHE.setdefault(api_key, entry)
+        _hydrated = True
+    
+    if _env()["api_key"] in entries:
+        logger.info("Restored HDFC Investright token from store")
+
+
+def _env() -> Dict[str, str]:
+    """Return cached broker credentials from the environment"""
+    global _ENV
+    if _ENV is None:
+        _ENV = {
+            "api_key": os.getenv("BROKER_API_KEY", ""),
+            "api_secret": os.getenv("BROKER_API_SECRET", ""),
+            "redirect_uri": os.getenv("BROKER_REDIRECT_URI", "http://localhost:8000/auth/callback")
+        }
+    return _ENV
+
+
+def _basic_auth() -> httpx.BasicAuth:
+    """Return the cached client credentials for the token endpoint"""
+    global _BASIC_AUTH
+    if _BASIC_AUTH is None:
+        env = _env()
+        _BASIC_AUTH = httpx.BasicAuth(env["api_key"], env["api_secret"])
+    return _BASIC_AUTH
+
+
+def clear_env_cache() -> None:
+    """Re-read broker credentials from the environment on next use"""
+    global _ENV, _BASIC_AUTH
+    _ENV = None
+    _BASIC_AUTH = None
+
 
 def generate_auth_url(state: str = "openalgo_state") -> str:
     """
@@ -26,12 +205,13 @@ def generate_auth_url(state: str = "openalgo_state") -> str:
     
     User should open this URL in browser to grant permission
     """
-    api_key = os.getenv("BROKER_API_KEY", "")
+    env = _env()
+    api_key = env["api_key"]
     
     if not api_key:
         raise ValueError("BROKER_API_KEY environment variable not set")
     
-    redirect_uri = os.getenv("BROKER_REDIRECT_URI", "http://localhost:8000/auth/callback")
+    redirect_uri = env["redirect_uri"]
     
     auth_url = (
         f"{AUTH_BASE_URL}/oauth/authorize"
@@ -45,7 +225,7 @@ def generate_auth_url(state: str = "openalgo_state") -> str:
     return auth_url
 
 
-def get_access_token(authorization_code: str) -> Optional[Dict]:
+async def get_access_token_async(authorization_code: str) -> Optional[Dict]:
     """
     Exchange authorization code for access token
     
@@ -56,15 +236,16 @@ def get_access_token(authorization_code: str) -> Optional[Dict]:
         Token response with access_token, refresh_token, expires_in
     """
     try:
-        api_key = os.getenv("BROKER_API_KEY", "")
-        api_secret = os.getenv("BROKER_API_SECRET", "")
-        redirect_uri = os.getenv("BROKER_REDIRECT_URI", "http://localhost:8000/auth/callback")
+        env = _env()
+        api_key = env["api_key"]
+        api_secret = env["api_secret"]
+        redirect_uri = env["redirect_uri"]
         
         if not api_key or not api_secret:
             logger.error("BROKER_API_KEY or BROKER_API_SECRET not set")
             return None
         
-        client = get_httpx_client()
+        client = await get_async_client()
         
         token_url = f"{AUTH_BASE_URL}/oauth/token"
         
@@ -76,14 +257,23 @@ def get_access_token(authorization_code: str) -> Optional[Dict]:
             "client_secret": api_secret
         }
         
-        response = client.post(
+        response = await client.post(
             token_url,
             data=payload,
-            auth=HTTPBasicAuth(api_key, api_secret)
+            headers=_FORM_HEADERS,
+            auth=_basic_auth()
         )
         
         if response.status_code == 200:
-            return response.json()
+            token_response = response.json()
+            await _store_token(api_key, token_response)
+            
+            # Warm the trading connection pool while the session starts up
+            task = asyncio.get_running_loop().create_task(preconnect())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+            
+            return token_response
         else:
             logger.error(f"Failed to get access token: {response.text}")
             return None
@@ -93,7 +283,7 @@ def get_access_token(authorization_code: str) -> Optional[Dict]:
         return None
 
 
-def refresh_access_token(refresh_token: str) -> Optional[Dict]:
+async def refresh_access_token_async(refresh_token: str) -> Optional[Dict]:
     """
     Refresh expired access token
     
@@ -104,14 +294,15 @@ def refresh_access_token(refresh_token: str) -> Optional[Dict]:
         New token response
     """
     try:
-        api_key = os.getenv("BROKER_API_KEY", "")
-        api_secret = os.getenv("BROKER_API_SECRET", "")
+        env = _env()
+        api_key = env["api_key"]
+        api_secret = env["api_secret"]
         
         if not api_key or not api_secret:
             logger.error("BROKER_API_KEY or BROKER_API_SECRET not set")
             return None
         
-        client = get_httpx_client()
+        client = await get_async_client()
         
         token_url = f"{AUTH_BASE_URL}/oauth/token"
         
@@ -122,14 +313,17 @@ def refresh_access_token(refresh_token: str) -> Optional[Dict]:
             "client_secret": api_secret
         }
         
-        response = client.post(
+        response = await client.post(
             token_url,
             data=payload,
-            auth=HTTPBasicAuth(api_key, api_secret)
+            headers=_FORM_HEADERS,
+            auth=_basic_auth()
         )
         
         if response.status_code == 200:
-            return response.json()
+            token_response = response.json()
+            await _store_token(api_key, token_response)
+            return token_response
         else:
             logger.error(f"Failed to refresh token: {response.text}")
             return None
@@ -139,10 +333,13 @@ def refresh_access_token(refresh_token: str) -> Optional[Dict]:
         return None
 
 
-def validate_token(access_token: str) -> bool:
+async def validate_token_async(access_token: str) -> bool:
     """
     Validate if access token is still valid
     
+    Costs a round-trip to /account/profile; prefer get_valid_access_token
+    and use this only as a last-resort check for tokens not in the cache
+    
     Args:
         access_token: Token to validate
         
@@ -150,7 +347,7 @@ def validate_token(access_token: str) -> bool:
         True if valid, False otherwise
     """
     try:
-        client = get_httpx_client()
+        client = await get_async_client()
         
         headers = {
             "Authorization": f"Bearer {access_token}",
@@ -158,7 +355,7 @@ def validate_token(access_token: str) -> bool:
         }
         
         # Try to fetch account info as validation
-        response = client.get(
+        response = await client.get(
             f"{AUTH_BASE_URL}/oapi/v1/account/profile",
             headers=headers,
             timeout=5.0
@@ -169,3 +366,103 @@ def validate_token(access_token: str) -> bool:
     except Exception as e:
         logger.warning(f"Token validation failed: {str(e)}")
         return False
+
+
+async def get_valid_access_token_async() -> Optional[str]:
+    """
+    Return a usable access token from the in-process cache
+    
+    The cached token is returned until TOKEN_REFRESH_RATIO of its lifetime
+    has elapsed, after which it is refreshed inline with the cached refresh
+    token. A ratio rather than a fixed buffer copes with both short- and
+    long-lived tokens.
+    Refreshes are double-checked under _refresh_lock so concurrent callers
+    share one refresh instead of each issuing their own. A failed refresh
+    keeps serving the cached token until it expires and is retried with
+    exponential backoff rather than on every call.
+    
+    Returns:
+        Access token, or None if no usable token is cached
+    """
+    if not _hydrated:
+        await _hydrate()
+    
+    api_key = _env()["api_key"]
+    
+    # Fast path: no lock while the cached token is fresh
+    entry = _TOKEN_CACHE.get(api_key)
+    if entry is None:
+        return None
+    
+    now = time.time()
+    if now < entry.refresh_at:
+        return entry.access_token
+    if now < entry.retry_at:
+        return entry.access_token if now < entry.expires_at else None
+    
+    async with _refresh_lock():
+        # Another coroutine may have refreshed while we waited for the lock
+        entry = _TOKEN_CACHE.get(api_key)
+        if entry is None:
+            return None
+        
+        now = time.time()
+        
+        if now < entry.refresh_at:
+            return entry.access_token
+        if now < entry.retry_at:
+            return entry.access_token if now < entry.expires_at else None
+        
+        if entry.refresh_expires_at is not None and now >= entry.refresh_expires_at:
+            logger.info("Cached refresh token expired, full authorization required")
+            _TOKEN_CACHE.pop(api_key, None)
+            return None
+        
+        token_response = await refresh_access_token_async(entry.refresh_token)
+        if not token_response:
+            entry.refresh_failures += 1
+            delay = min(REFRESH_RETRY_MAX, REFRESH_RETRY_BASE * 2 ** (entry.refresh_failures - 1))
+            entry.retry_at = time.time() + delay
+            logger.warning(f"HDFC token refresh failed, retrying in {delay:.0f}s")
+            return entry.access_token if time.time() < entry.expires_at else None
+        
+        return _TOKEN_CACHE[api_key].access_token
+
+
+def clear_token_cache() -> None:
+    """Drop all cached and persisted tokens"""
+    global _hydrated
+    
+    _TOKEN_CACHE.clear()
+    # Nothing left to restore; do not reload from the store on next use
+    _hydrated = True
+    
+    try:
+        from broker.hdfc_investright.database.token_store import delete_tokens
+        
+        delete_tokens()
+    except Exception as e:
+        logger.warning(f"Could not delete persisted HDFC tokens: {str(e)}")
+
+
+# Blocking entry points called by the OpenAlgo framework
+
+
+def get_access_token(authorization_code: str) -> Optional[Dict]:
+    """Blocking wrapper around get_access_token_async"""
+    return run_sync(get_access_token_async(authorization_code))
+
+
+def refresh_access_token(refresh_token: str) -> Optional[Dict]:
+    """Blocking wrapper around refresh_access_token_async"""
+    return run_sync(refresh_access_token_async(refresh_token))
+
+
+def validate_token(access_token: str) -> bool:
+    """Blocking wrapper around validate_token_async"""
+    return run_sync(validate_token_async(access_token))
+
+
+def get_valid_access_token() -> Optional[str]:
+    """Blocking wrapper around get_valid_access_token_async"""
+    return run_sync(get_valid_access_token_async())
@@ -3,47 +3,136 @@ HDFC Investright Market Data API
 Fetches market data, quotes, and historical data
 """
 
-import json
-import logging
-from typing import Dict, List, Optional
+import asyncio
+import copy
+import os
+import threading
+from typing import Awaitable, Callable, Dict, List, Tuple
 
-from broker.hdfc_investright.api.baseurl import get_url
-from utils.httpx_client import get_httpx_client
+import orjson
+from cachetools import TTLCache
+
+from broker.hdfc_investright.api._client import auth_headers, get_async_client, loop_local, run_sync
+from broker.hdfc_investright.api._ratelimit import data_limiter
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Short-lived caches that absorb repeated polls of the same symbol
+DATA_QUOTE_TTL = float(os.getenv("DATA_QUOTE_TTL", "0.5"))
+DATA_DEPTH_TTL = float(os.getenv("DATA_DEPTH_TTL", "0.1"))
 
-def get_api_response(endpoint: str, auth: str, method: str = "GET", params: Dict = None) -> Dict:
-    """Make authenticated request to HDFC market data API"""
-    client = get_httpx_client()
+_quote_cache = TTLCache(maxsize=2048, ttl=DATA_QUOTE_TTL)
+_depth_cache = TTLCache(maxsize=2048, ttl=DATA_DEPTH_TTL)
+_cache_lock = threading.Lock()
+
+# Upper bound on concurrent quote requests issued by get_quotes_bulk
+DATA_BULK_CONCURRENCY = int(os.getenv("DATA_BULK_CONCURRENCY", "16"))
+
+
+def _bulk_semaphore() -> asyncio.Semaphore:
+    """Per-loop semaphore bounding get_quotes_bulk concurrency"""
+    return loop_local("data_bulk_semaphore", lambda: asyncio.Semaphore(DATA_BULK_CONCURRENCY))
+
+
+def _inflight() -> Dict[tuple, asyncio.Future]:
+    """Per-loop map of requests currently on the wire, keyed by endpoint and parameters"""
+    return loop_local("data_inflight", dict)
+
+
+async def _request(endpoint: str, auth: str, method: str = "GET", params: Dict = None) -> Tuple[int, Dict]:
+    """
+    Make authenticated request to HDFC market data API
     
-    headers = {
-        "Authorization": f"Bearer {auth}",
-        "Content-Type": "application/json"
-    }
+    Returns:
+        (HTTP status code, response JSON); status is 0 if the request
+        itself failed
+    """
+    await data_limiter.acquire()
     
-    url = get_url(endpoint)
+    client = await get_async_client()
+    headers = auth_headers(auth)
     
     try:
         if method == "GET":
-            response = client.get(url, headers=headers, params=params or {})
+            response = await client.get(endpoint, params=params or {}, headers=headers)
         else:
-            response = client.request(method, url, headers=headers)
+            response = await client.request(method, endpoint, headers=headers)
         
-        response.status = response.status_code
-        
-        return response.json() if response.text else {}
+        data = orjson.loads(response.content) if response.content else {}
+        if not response.is_success:
+            logger.error(f"API error: {response.status_code} - {data}")
+        return response.status_code, data
     
     except Exception as e:
         logger.error(f"API request failed: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        return 0, {"status": "error", "message": str(e)}
 
 
-def get_quotes(symbol: str, exchange: str, auth: str) -> Dict:
+async def get_api_response_async(endpoint: str, auth: str, method: str = "GET", params: Dict = None) -> Dict:
+    """Make authenticated request to HDFC market data API"""
+    _, data = await _request(endpoint, auth, method, params)
+    return data
+
+
+def _is_success(status: int) -> bool:
+    """Only 2xx responses are cacheable"""
+    return 200 <= status < 300
+
+
+class _LeaderCancelled(Exception):
+    """Published on a shared Future when the caller running the request is cancelled"""
+
+
+async def _single_flight(key: tuple, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+    """
+    Share one in-flight request between concurrent callers with the same key
+    
+    The first caller runs fetch() and publishes the result on a Future;
+    callers arriving before it completes await that Future instead of
+    issuing a duplicate request. If the first caller is cancelled, the
+    waiters retry and one of them takes over the request.
+    """
+    inflight = _inflight()
+    while True:
+        future = inflight.get(key)
+        if future is None:
+            break
+        try:
+            return await asyncio.shield(future)
+        except _LeaderCancelled:
+            continue
+    
+    future = asyncio.get_running_loop().create_future()
+    inflight[key] = future
+    try:
+        result = await fetch()
+    except asyncio.CancelledError:
+        # Do not cancel the shared Future: that would cancel every waiter too
+        future.set_exception(_LeaderCancelled())
+        future.exception()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark retrieved so an unawaited Future does not log a warning
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if inflight.get(key) is future:
+            del inflight[key]
+
+
+async def get_quotes_async(symbol: str, exchange: str, auth: str) -> Dict:
     """
     Get live quote for a symbol
     
+    2xx responses are cached for DATA_QUOTE_TTL seconds per
+    (symbol, exchange), and concurrent misses share a single request.
+    Each caller gets its own copy, so the result may be modified.
+    
     Args:
         symbol: Trading symbol
         exchange: Exchange code (NSE, BSE, NFO, etc.)
@@ -53,19 +142,56 @@ def get_quotes(symbol: str, exchange: str, auth: str) -> Dict:
         Quote data
     """
     try:
+        key = (symbol, exchange)
+        with _cache_lock:
+            cached = _quote_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         params = {
             "symbol": symbol,
             "exchange": exchange
         }
-        response = get_api_response("/quotes", auth, params=params)
-        return response
+        
+        async def fetch() -> Dict:
+            status, response = await _request("/quotes", auth, params=params)
+            if _is_success(status):
+                with _cache_lock:
+                    _quote_cache[key] = response
+            return response
+        
+        return copy.deepcopy(await _single_flight(("/quotes",) + key, fetch))
     
     except Exception as e:
         logger.error(f"Error fetching quote for {symbol}: {str(e)}")
         return {"status": "error"}
 
 
-def get_history(
+async def get_quotes_bulk_async(symbols: List[Tuple[str, str]], auth: str) -> List:
+    """
+    Get live quotes for many symbols concurrently
+    
+    At most DATA_BULK_CONCURRENCY requests are in flight at once so a large
+    watchlist does not trip the broker's rate limits.
+    
+    Args:
+        symbols: List of (symbol, exchange) pairs
+        auth: Bearer token
+        
+    Returns:
+        Quote data (or the raised exception) for each pair, in input order
+    """
+    async def fetch_one(symbol: str, exchange: str) -> Dict:
+        async with _bulk_semaphore():
+            return await get_quotes_async(symbol, exchange, auth)
+    
+    return await asyncio.gather(
+        *[fetch_one(symbol, exchange) for symbol, exchange in symbols],
+        return_exceptions=True
+    )
+
+
+async def get_history_async(
     symbol: str,
     exchange: str,
     interval: str,
@@ -76,6 +202,9 @@ def get_history(
     """
     Get historical OHLC data
     
+    Concurrent calls with identical arguments share a single request;
+    each caller gets its own copy of the result.
+    
     Args:
         symbol: Trading symbol
         exchange: Exchange code
@@ -95,18 +224,25 @@ def get_history(
             "start_date": start_date,
             "end_date": end_date
         }
-        response = get_api_response("/history", auth, params=params)
-        return response
+        key = ("/history", symbol, exchange, interval, start_date, end_date)
+        response = await _single_flight(
+            key,
+            lambda: get_api_response_async("/history", auth, params=params)
+        )
+        return copy.deepcopy(response)
     
     except Exception as e:
         logger.error(f"Error fetching history for {symbol}: {str(e)}")
         return {"status": "error", "candles": []}
 
 
-def get_depth(symbol: str, exchange: str, auth: str) -> Dict:
+async def get_depth_async(symbol: str, exchange: str, auth: str) -> Dict:
     """
     Get market depth (order book)
     
+    2xx responses are cached for DATA_DEPTH_TTL seconds per
+    (symbol, exchange). Each caller gets its own copy.
+    
     Args:
         symbol: Trading symbol
         exchange: Exchange code
@@ -116,13 +252,65 @@ def get_depth(symbol: str, exchange: str, auth: str) -> Dict:
         Market depth data
     """
     try:
+        key = (symbol, exchange)
+        with _cache_lock:
+            cached = _depth_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         params = {
             "symbol": symbol,
             "exchange": exchange
         }
-        response = get_api_response("/depth", auth, params=params)
+        status, response = await _request("/depth", auth, params=params)
+        
+        if _is_success(status):
+            with _cache_lock:
+                _depth_cache[key] = copy.deepcopy(response)
         return response
     
     except Exception as e:
         logger.error(f"Error fetching depth for {symbol}: {str(e)}")
         return {"status": "error"}
+
+
+def clear_market_data_cache() -> None:
+    """Drop cached quotes and depth"""
+    with _cache_lock:
+        _quote_cache.clear()
+        _depth_cache.clear()
+
+
+# Blocking entry points called by the OpenAlgo framework
+
+
+def get_api_response(endpoint: str, auth: str, method: str = "GET", params: Dict = None) -> Dict:
+    """Blocking wrapper around get_api_response_async"""
+    return run_sync(get_api_response_async(endpoint, auth, method, params))
+
+
+def get_quotes(symbol: str, exchange: str, auth: str) -> Dict:
+    """Blocking wrapper around get_quotes_async"""
+    return run_sync(get_quotes_async(symbol, exchange, auth))
+
+
+def get_quotes_bulk(symbols: List[Tuple[str, str]], auth: str) -> List:
+    """Blocking wrapper around get_quotes_bulk_async"""
+    return run_sync(get_quotes_bulk_async(symbols, auth))
+
+
+def get_history(
+    symbol: str,
+    exchange: str,
+    interval: str,
+    start_date: str,
+    end_date: str,
+    auth: str
+) -> Dict:
+    """Blocking wrapper around get_history_async"""
+    return run_sync(get_history_async(symbol, exchange, interval, start_date, end_date, auth))
+
+
+def get_depth(symbol: str, exchange: str, auth: str) -> Dict:
+    """Blocking wrapper around get_depth_async"""
+    return run_sync(get_depth_async(symbol, exchange, auth))
@@ -3,64 +3,79 @@ HDFC Investright Order Management API
 Implements order placement, modification, and cancellation
 """
 
-import json
-import logging
-from typing import Dict, Optional, List
+import asyncio
+import copy
+import inspect
+from functools import partial, wraps
+from typing import Awaitable, Callable, Dict, Optional, List
 
 import httpx
+import orjson
 
-from broker.hdfc_investright.api.baseurl import get_url
+from broker.hdfc_investright.api._client import auth_headers, get_async_client, run_sync
+from broker.hdfc_investright.api._ratelimit import order_limiter
 from broker.hdfc_investright.mapping import transform_data
-from database.token_db import get_br_symbol, get_oa_symbol
-from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 
-def get_api_response(endpoint: str, auth: str, method: str = "GET", payload: str = "") -> Dict:
+def _wrap_errors(action: str, default: Optional[Dict] = None):
     """
-    Make authenticated HTTP request to HDFC API
+    Log and swallow exceptions raised by an order API coroutine
     
     Args:
-        endpoint: API endpoint (e.g., "/orders")
+        action: Description used in the log message (e.g. "placing order");
+                the order_id argument is appended when the function has one
+        default: Response returned on failure; when omitted an error
+                 response carrying the exception message is returned
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                try:
+                    order_id = signature.bind_partial(*args, **kwargs).arguments.get("order_id")
+                except TypeError:
+                    order_id = None
+                target = f"{action} {order_id}" if order_id is not None else action
+                logger.error(f"Error {target}: {str(e)}")
+                if default is None:
+                    return {"status": "error", "message": str(e)}
+                return copy.deepcopy(default)
+        return wrapper
+    return decorator
+
+
+async def _send(send: Callable[[httpx.AsyncClient, Dict[str, str]], Awaitable[httpx.Response]], auth: str) -> Dict:
+    """
+    Issue one authenticated request and decode the HDFC response
+    
+    Args:
+        send: Callable that issues the request on the shared client with
+              the given headers
         auth: Bearer token
-        method: HTTP method (GET, POST, PUT, DELETE)
-        payload: JSON payload for POST/PUT requests
         
     Returns:
         Response JSON
     """
-    client = get_httpx_client()
-    
-    headers = {
-        "Authorization": f"Bearer {auth}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    
-    url = get_url(endpoint)
+    await order_limiter.acquire()
     
-    logger.debug(f"Request: {method} {url}")
+    client = await get_async_client()
     
     try:
-        if method == "GET":
-            response = client.get(url, headers=headers)
-        elif method == "POST":
-            response = client.post(url, headers=headers, content=payload)
-        elif method == "PUT":
-            response = client.put(url, headers=headers, content=payload)
-        elif method == "DELETE":
-            response = client.delete(url, headers=headers)
-        else:
-            raise ValueError(f"Unsupported method: {method}")
+        response = await send(client, auth_headers(auth))
         
         response.status = response.status_code
         
         if response.status_code in [200, 201]:
-            return response.json() if response.text else {"status": "success"}
+            return orjson.loads(response.content) if response.content else {"status": "success"}
         else:
-            error_response = response.json() if response.text else {}
+            error_response = orjson.loads(response.content) if response.content else {}
             logger.error(f"API error: {response.status_code} - {error_response}")
             return error_response
     
@@ -69,7 +84,31 @@ def get_api_response(endpoint: str, auth: str, method: str = "GET", payload: str
         return {"status": "error", "message": str(e)}
 
 
-def place_order(order: Dict, auth: str) -> Dict:
+# Request builders for the fixed endpoints, bound once at import
+_get_orders = partial(_send, lambda client, headers: client.get("/orders", headers=headers))
+_get_trades = partial(_send, lambda client, headers: client.get("/trades/book", headers=headers))
+_get_positions = partial(_send, lambda client, headers: client.get("/positions", headers=headers))
+_get_holdings = partial(_send, lambda client, headers: client.get("/holdings", headers=headers))
+
+
+def _post_order(body: Dict, auth: str) -> Awaitable[Dict]:
+    return _send(lambda client, headers: client.post("/orders", content=orjson.dumps(body), headers=headers), auth)
+
+
+def _put_order(order_id: str, body: Dict, auth: str) -> Awaitable[Dict]:
+    return _send(lambda client, headers: client.put(f"/orders/{order_id}", content=orjson.dumps(body), headers=headers), auth)
+
+
+def _delete_order(order_id: str, auth: str) -> Awaitable[Dict]:
+    return _send(lambda client, headers: client.delete(f"/orders/{order_id}", headers=headers), auth)
+
+
+def _get_order(order_id: str, auth: str) -> Awaitable[Dict]:
+    return _send(lambda client, headers: client.get(f"/orders/{order_id}", headers=headers), auth)
+
+
+@_wrap_errors("placing order")
+async def place_order_async(order: Dict, auth: str) -> Dict:
     """
     Place a new order on HDFC Investright
     
@@ -84,26 +123,17 @@ def place_order(order: Dict, auth: str) -> Dict:
         "product": "MIS"
     }
     """
-    try:
-        # Transform OpenAlgo order to HDFC format
-        hdfc_order = transform_data.map_order_to_hdfc(order)
-        
-        payload = json.dumps(hdfc_order)
-        
-        response = get_api_response("/orders", auth, method="POST", payload=payload)
-        
-        # Transform response back to OpenAlgo format
-        return transform_data.map_hdfc_order_response(response)
+    # Transform OpenAlgo order to HDFC format
+    hdfc_order = transform_data.map_order_to_hdfc(order)
     
-    except Exception as e:
-        logger.error(f"Error placing order: {str(e)}")
-        return {
-            "status": "error",
-            "message": str(e)
-        }
+    response = await _post_order(hdfc_order, auth)
+    
+    # Transform response back to OpenAlgo format
+    return transform_data.map_hdfc_order_response(response)
 
 
-def modify_order(order_id: str, order: Dict, auth: str) -> Dict:
+@_wrap_errors("modifying order")
+async def modify_order_async(order_id: str, order: Dict, auth: str) -> Dict:
     """
     Modify an existing order
     
@@ -115,129 +145,110 @@ def modify_order(order_id: str, order: Dict, auth: str) -> Dict:
     Returns:
         Modified order response
     """
-    try:
-        hdfc_order = transform_data.map_order_to_hdfc(order)
-        payload = json.dumps(hdfc_order)
-        
-        response = get_api_response(f"/orders/{order_id}", auth, method="PUT", payload=payload)
-        return transform_data.map_hdfc_order_response(response)
+    hdfc_order = transform_data.map_order_to_hdfc(order)
     
-    except Exception as e:
-        logger.error(f"Error modifying order {order_id}: {str(e)}")
-        return {"status": "error", "message": str(e)}
+    response = await _put_order(order_id, hdfc_order, auth)
+    return transform_data.map_hdfc_order_response(response)
 
 
-def cancel_order(order_id: str, auth: str) -> Dict:
+@_wrap_errors("canceling order")
+async def cancel_order_async(order_id: str, auth: str) -> Dict:
     """Cancel an existing order"""
-    try:
-        response = get_api_response(f"/orders/{order_id}", auth, method="DELETE")
-        return response
-    
-    except Exception as e:
-        logger.error(f"Error canceling order {order_id}: {str(e)}")
-        return {"status": "error", "message": str(e)}
+    return await _delete_order(order_id, auth)
 
 
-def get_order(order_id: str, auth: str) -> Dict:
+@_wrap_errors("fetching order")
+async def get_order_async(order_id: str, auth: str) -> Dict:
     """Get details of a specific order"""
-    try:
-        response = get_api_response(f"/orders/{order_id}", auth, method="GET")
-        return transform_data.map_hdfc_order_response(response)
-    
-    except Exception as e:
-        logger.error(f"Error fetching order {order_id}: {str(e)}")
-        return {"status": "error", "message": str(e)}
+    response = await _get_order(order_id, auth)
+    return transform_data.map_hdfc_order_response(response)
 
 
-def get_order_book(auth: str) -> Dict:
+@_wrap_errors("fetching order book", default={"status": "error", "orders": []})
+async def get_order_book_async(auth: str) -> Dict:
     """
     Get all orders for the day
     
     Returns orders in OpenAlgo format
     """
-    try:
-        response = get_api_response("/orders", auth, method="GET")
-        
-        if response.get("status") == "error":
-            return {"status": "error", "orders": []}
-        
-        orders = response.get("orders", [])
-        transformed_orders = [transform_data.map_hdfc_order_response(order) for order in orders]
-        
-        return {
-            "status": "success",
-            "orders": transformed_orders
-        }
+    response = await _get_orders(auth)
     
-    except Exception as e:
-        logger.error(f"Error fetching order book: {str(e)}")
+    if response.get("status") == "error":
         return {"status": "error", "orders": []}
+    
+    orders = response.get("orders", [])
+    # The bulk lookup may query the database on a cache miss; keep it off the loop
+    symbols = await asyncio.to_thread(transform_data.resolve_oa_symbols, orders)
+    transformed_orders = [transform_data.map_hdfc_order_response(order, symbols) for order in orders]
+    
+    return {
+        "status": "success",
+        "orders": transformed_orders
+    }
 
 
-def get_trade_book(auth: str) -> Dict:
+@_wrap_errors("fetching trade book", default={"status": "error", "trades": []})
+async def get_trade_book_async(auth: str) -> Dict:
     """Get all trades executed today"""
-    try:
-        response = get_api_response("/trades/book", auth, method="GET")
-        
-        if response.get("status") == "error":
-            return {"status": "error", "trades": []}
-        
-        trades = response.get("trades", [])
-        transformed_trades = [transform_data.map_hdfc_trade_response(trade) for trade in trades]
-        
-        return {
-            "status": "success",
-            "trades": transformed_trades
-        }
+    response = await _get_trades(auth)
     
-    except Exception as e:
-        logger.error(f"Error fetching trade book: {str(e)}")
+    if response.get("status") == "error":
         return {"status": "error", "trades": []}
+    
+    trades = response.get("trades", [])
+    symbols = await asyncio.to_thread(transform_data.resolve_oa_symbols, trades)
+    transformed_trades = [transform_data.map_hdfc_trade_response(trade, symbols) for trade in trades]
+    
+    return {
+        "status": "success",
+        "trades": transformed_trades
+    }
 
 
-def get_positions(auth: str) -> Dict:
+@_wrap_errors("fetching positions", default={"status": "error", "positions": []})
+async def get_positions_async(auth: str) -> Dict:
     """Get all open positions"""
-    try:
-        response = get_api_response("/positions", auth, method="GET")
-        
-        if response.get("status") == "error":
-            return {"status": "error", "positions": []}
-        
-        positions = response.get("positions", [])
-        transformed_positions = [transform_data.map_hdfc_position(pos) for pos in positions]
-        
-        return {
-            "status": "success",
-            "positions": transformed_positions
-        }
+    response = await _get_positions(auth)
     
-    except Exception as e:
-        logger.error(f"Error fetching positions: {str(e)}")
+    if response.get("status") == "error":
         return {"status": "error", "positions": []}
+    
+    positions = response.get("positions", [])
+    symbols = await asyncio.to_thread(transform_data.resolve_oa_symbols, positions)
+    transformed_positions = [transform_data.map_hdfc_position(pos, symbols) for pos in positions]
+    
+    return {
+        "status": "success",
+        "positions": transformed_positions
+    }
 
 
-def get_holdings(auth: str) -> Dict:
+@_wrap_errors("fetching holdings", default={"status": "error", "holdings": []})
+async def get_holdings_async(auth: str) -> Dict:
     """Get portfolio holdings (delivery)"""
-    try:
-        response = get_api_response("/holdings", auth, method="GET")
-        
-        if response.get("status") == "error":
-            return {"status": "error", "holdings": []}
-        
-        holdings = response.get("holdings", [])
-        transformed_holdings = [transform_data.map_hdfc_holding(holding) for holding in holdings]
-        
-        return {
-            "status": "success",
-            "holdings": transformed_holdings
-        }
+    response = await _get_holdings(auth)
     
-    except Exception as e:
-        logger.error(f"Error fetching holdings: {str(e)}")
+    if response.get("status") == "error":
         return {"status": "error", "holdings": []}
+    
+    holdings = response.get("holdings", [])
+    symbols = await asyncio.to_thread(transform_data.resolve_oa_symbols, holdings)
+    transformed_holdings = [transform_data.map_hdfc_holding(holding, symbols) for holding in holdings]
+    
+    return {
+        "status": "success",
+        "holdings": transformed_holdings
+    }
 
 
-def get_open_position(tradingsymbol: str, exchange: str, producttype: str, auth: str) -> Dict:
+@_wrap_errors("getting open position", default={})
+async def get_open_position_async(
+    tradingsymbol: str,
+    exchange: str,
+    producttype: str,
+    auth: str,
+    positions: Optional[List[Dict]] = None
+) -> Dict:
     """
     Get open position for a specific symbol
     
@@ -246,24 +257,104 @@ def get_open_position(tradingsymbol: str, exchange: str, producttype: str, auth:
         exchange: Exchange code
         producttype: Product type (MIS, CNC, NRML)
         auth: Bearer token
+        positions: Already fetched positions (OpenAlgo format); fetched
+                   from the broker when not supplied
         
     Returns:
         Position data or empty if not found
     """
-    try:
-        positions_response = get_positions(auth)
+    if positions is None:
+        positions_response = await get_positions_async(auth)
         positions = positions_response.get("positions", [])
-        
-        # Convert to broker symbol for comparison
-        br_symbol = get_br_symbol(tradingsymbol, exchange)
-        
-        for position in positions:
-            if (position.get("tradingsymbol") == br_symbol and 
-                position.get("exchange") == exchange):
-                return position
-        
-        return {}
     
-    except Exception as e:
-        logger.error(f"Error getting open position: {str(e)}")
-        return {}
+    # Positions are already mapped back to OpenAlgo symbols
+    for position in positions:
+        if (position.get("symbol") == tradingsymbol and 
+            position.get("exchange") == exchange):
+            return position
+    
+    return {}
+
+
+async def get_dashboard_async(auth: str) -> Dict:
+    """
+    Fetch order book, trade book, positions and holdings concurrently
+    
+    The four account calls are issued together, so a dashboard refresh
+    costs one round-trip instead of four.
+    
+    Returns:
+        Dict with "orders", "trades", "positions" and "holdings" responses
+    """
+    orders, trades, positions, holdings = await asyncio.gather(
+        get_order_book_async(auth),
+        get_trade_book_async(auth),
+        get_positions_async(auth),
+        get_holdings_async(auth)
+    )
+    
+    return {
+        "orders": orders,
+        "trades": trades,
+        "positions": positions,
+        "holdings": holdings
+    }
+
+
+# Blocking entry points called by the OpenAlgo framework
+
+
+def place_order(order: Dict, auth: str) -> Dict:
+    """Blocking wrapper around place_order_async"""
+    return run_sync(place_order_async(order, auth))
+
+
+def modify_order(order_id: str, order: Dict, auth: str) -> Dict:
+    """Blocking wrapper around modify_order_async"""
+    return run_sync(modify_order_async(order_id, order, auth))
+
+
+def cancel_order(order_id: str, auth: str) -> Dict:
+    """Blocking wrapper around cancel_order_async"""
+    return run_sync(cancel_order_async(order_id, auth))
+
+
+def get_order(order_id: str, auth: str) -> Dict:
+    """Blocking wrapper around get_order_async"""
+    return run_sync(get_order_async(order_id, auth))
+
+
+def get_order_book(auth: str) -> Dict:
+    """Blocking wrapper around get_order_book_async"""
+    return run_sync(get_order_book_async(auth))
+
+
+def get_trade_book(auth: str) -> Dict:
+    """Blocking wrapper around get_trade_book_async"""
+    return run_sync(get_trade_book_async(auth))
+
+
+def get_positions(auth: str) -> Dict:
+    """Blocking wrapper around get_positions_async"""
+    return run_sync(get_positions_async(auth))
+
+
+def get_holdings(auth: str) -> Dict:
+    """Blocking wrapper around get_holdings_async"""
+    return run_sync(get_holdings_async(auth))
+
+
+def get_open_position(
+    tradingsymbol: str,
+    exchange: str,
+    producttype: str,
+    auth: str,
+    positions: Optional[List[Dict]] = None
+) -> Dict:
+    """Blocking wrapper around get_open_position_async"""
+    return run_sync(get_open_position_async(tradingsymbol, exchange, producttype, auth, positions))
+
+
+def get_dashboard(auth: str) -> Dict:
+    """Blocking wrapper around get_dashboard_async"""
+    return run_sync(get_dashboard_async(auth))
@@ -0,0 +1,127 @@
+"""
+HDFC Investright OAuth token store
+Persists the token cache so access/refresh tokens survive process restarts
+"""
+
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import Column, Float, Integer, String, Text, create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database.auth_db import decrypt_token, encrypt_token
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+BROKER_NAME = "hdfc_investright"
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Conditionally create engine based on DB type
+if DATABASE_URL and "sqlite" in DATABASE_URL:
+    # SQLite: Use NullPool to prevent connection pool exhaustion
+    engine = create_engine(
+        DATABASE_URL, poolclass=NullPool, connect_args={"check_same_thread": False}
+    )
+else:
+    # For other databases like PostgreSQL, use connection pooling
+    engine = create_engine(DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
+db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+Base = declarative_base()
+Base.query = db_session.query_property()
+
+_initialized = False
+
+
+class HdfcToken(Base):
+    __tablename__ = "hdfc_investright_tokens"
+    id = Column(Integer, primary_key=True)
+    api_key = Column(String(255), unique=True, nullable=False)
+    broker = Column(String(20), nullable=False, default=BROKER_NAME)
+    access = Column(Text, nullable=False)  # Encrypted access token
+    refresh = Column(Text, nullable=True)  # Encrypted refresh token
+    # Absolute epoch seconds, never relative expires_in, so reloads stay correct
+    expires_at = Column(Float, nullable=False)
+    issued_at = Column(Float, nullable=False)
+    refresh_expires_at = Column(Float, nullable=True)
+
+
+def init_db():
+    """Create the token table if it does not exist"""
+    global _initialized
+    if not _initialized:
+        from database.db_init_helper import init_db_with_logging
+
+        init_db_with_logging(Base, engine, "HDFC Investright Token DB", logger)
+        _initialized = True
+
+
+def save_token(
+    api_key: str,
+    access_token: str,
+    refresh_token: str,
+    expires_at: float,
+    issued_at: float,
+    refresh_expires_at: Optional[float] = None
+) -> None:
+    """Insert or update the persisted tokens for an api key"""
+    try:
+        init_db()
+        row = HdfcToken.query.filter_by(api_key=api_key).first()
+        if row is None:
+            row = HdfcToken(api_key=api_key, broker=BROKER_NAME)
+            db_session.add(row)
+
+        row.access = encrypt_token(access_token)
+        row.refresh = encrypt_token(refresh_token)
+        row.expires_at = expires_at
+        row.issued_at = issued_at
+        row.refresh_expires_at = refresh_expires_at
+        db_session.commit()
+
+    except Exception as e:
+        db_session.rollback()
+        logger.error(f"Failed to persist HDFC Investright token: {str(e)}")
+
+
+def load_tokens() -> Dict[str, Dict]:
+    """
+    Load all persisted tokens
+
+    Returns:
+        Dict of api_key -> token fields (decrypted)
+    """
+    try:
+        init_db()
+        tokens = {}
+        for row in HdfcToken.query.filter_by(broker=BROKER_NAME).all():
+            access_token = decrypt_token(row.access)
+            if not access_token:
+                continue
+            tokens[row.api_key] = {
+                "access_token": access_token,
+                "refresh_token": decrypt_token(row.refresh) or "",
+                "expires_at": row.expires_at,
+                "issued_at": row.issued_at,
+                "refresh_expires_at": row.refresh_expires_at
+            }
+        return tokens
+
+    except Exception as e:
+        logger.error(f"Failed to load HDFC Investright tokens: {str(e)}")
+        return {}
+
+
+def delete_tokens() -> None:
+    """Remove all persisted tokens"""
+    try:
+        init_db()
+        HdfcToken.query.filter_by(broker=BROKER_NAME).delete()
+        db_session.commit()
+
+    except Exception as e:
+        db_session.rollback()
+        logger.error(f"Failed to delete HDFC Investright tokens: {str(e)}")
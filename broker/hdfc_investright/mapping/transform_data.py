@@ -3,15 +3,29 @@ HDFC Investright Data Transformation
 Maps between OpenAlgo and HDFC Investright formats
 """
 
-import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-from database.token_db import get_br_symbol, get_oa_symbol
+from database.token_db import get_br_symbol, get_oa_symbol, get_oa_symbols_bulk
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+def resolve_oa_symbols(items: List[Dict]) -> Dict:
+    """
+    Resolve OpenAlgo symbols for a whole book in one lookup
+    
+    Args:
+        items: HDFC orders/trades/positions/holdings with symbol and exchange
+        
+    Returns:
+        Dict of (broker symbol, exchange) -> OpenAlgo symbol, for the
+        symbols= argument of the map_hdfc_* functions
+    """
+    pairs = [(item.get("symbol", ""), item.get("exchange", "")) for item in items]
+    return get_oa_symbols_bulk(pairs)
+
+
 # Order type mapping
 ORDER_TYPE_MAP = {
     "MARKET": "MKT",
@@ -51,6 +65,15 @@ VALIDITY_MAP = {
     "GTC": "GTC"
 }
 
+# Bound lookups for the per-row transform loops. A missing key falls through
+# to the same default the mapping would pick, so callers pass raw values.
+_get_order_type = ORDER_TYPE_MAP.get
+_get_order_type_reverse = ORDER_TYPE_REVERSE_MAP.get
+_get_product = PRODUCT_MAP.get
+_get_product_reverse = PRODUCT_REVERSE_MAP.get
+_get_side = SIDE_MAP.get
+_get_validity = VALIDITY_MAP.get
+
 
 def map_order_to_hdfc(order: Dict) -> Dict:
     """
@@ -75,11 +98,11 @@ def map_order_to_hdfc(order: Dict) -> Dict:
         hdfc_order = {
             "symbol": br_symbol,
             "exchange": exchange,
-            "side": SIDE_MAP.get(order.get("side", "BUY"), "BUY"),
+            "side": _get_side(order.get("side"), "BUY"),
             "quantity": int(order.get("quantity", 0)),
-            "order_type": ORDER_TYPE_MAP.get(order.get("order_type", "MARKET"), "MKT"),
-            "product": PRODUCT_MAP.get(order.get("product", "MIS"), "MIS"),
-            "validity": VALIDITY_MAP.get(order.get("validity", "DAY"), "DAY")
+            "order_type": _get_order_type(order.get("order_type"), "MKT"),
+            "product": _get_product(order.get("product"), "MIS"),
+            "validity": _get_validity(order.get("validity"), "DAY")
         }
         
         # Add optional fields
@@ -100,12 +123,13 @@ def map_order_to_hdfc(order: Dict) -> Dict:
         raise
 
 
-def map_hdfc_order_response(hdfc_order: Dict) -> Dict:
+def map_hdfc_order_response(hdfc_order: Dict, symbols: Optional[Dict] = None) -> Dict:
     """
     Convert HDFC order response to OpenAlgo format
     
     Args:
         hdfc_order: HDFC order response
+        symbols: Pre-resolved OpenAlgo symbols from resolve_oa_symbols
         
     Returns:
         OpenAlgo order format
@@ -114,7 +138,7 @@ def map_hdfc_order_response(hdfc_order: Dict) -> Dict:
         # Get OpenAlgo symbol from broker symbol
         exchange = hdfc_order.get("exchange", "")
         br_symbol = hdfc_order.get("symbol", "")
-        oa_symbol = get_oa_symbol(br_symbol, exchange)
+        oa_symbol = symbols.get((br_symbol, exchange)) if symbols is not None else get_oa_symbol(br_symbol, exchange)
         if not oa_symbol:
             oa_symbol = br_symbol
         
@@ -125,8 +149,8 @@ def map_hdfc_order_response(hdfc_order: Dict) -> Dict:
             "side": hdfc_order.get("side", ""),
             "quantity": hdfc_order.get("quantity", 0),
             "price": hdfc_order.get("price", 0),
-            "order_type": ORDER_TYPE_REVERSE_MAP.get(hdfc_order.get("order_type", "MKT"), "MARKET"),
-            "product": PRODUCT_REVERSE_MAP.get(hdfc_order.get("product", "MIS"), "MIS"),
+            "order_type": _get_order_type_reverse(hdfc_order.get("order_type"), "MARKET"),
+            "product": _get_product_reverse(hdfc_order.get("product"), "MIS"),
             "order_status": hdfc_order.get("status", ""),
             "filled_quantity": hdfc_order.get("filled_quantity", 0),
             "pending_quantity": hdfc_order.get("pending_quantity", 0),
@@ -139,12 +163,12 @@ def map_hdfc_order_response(hdfc_order: Dict) -> Dict:
         return hdfc_order
 
 
-def map_hdfc_trade_response(hdfc_trade: Dict) -> Dict:
+def map_hdfc_trade_response(hdfc_trade: Dict, symbols: Optional[Dict] = None) -> Dict:
     """Convert HDFC trade response to OpenAlgo format"""
     try:
         exchange = hdfc_trade.get("exchange", "")
         br_symbol = hdfc_trade.get("symbol", "")
-        oa_symbol = get_oa_symbol(br_symbol, exchange)
+        oa_symbol = symbols.get((br_symbol, exchange)) if symbols is not None else get_oa_symbol(br_symbol, exchange)
         if not oa_symbol:
             oa_symbol = br_symbol
         
@@ -164,12 +188,12 @@ def map_hdfc_trade_response(hdfc_trade: Dict) -> Dict:
         return hdfc_trade
 
 
-def map_hdfc_position(hdfc_pos: Dict) -> Dict:
+def map_hdfc_position(hdfc_pos: Dict, symbols: Optional[Dict] = None) -> Dict:
     """Convert HDFC position to OpenAlgo format"""
     try:
         exchange = hdfc_pos.get("exchange", "")
         br_symbol = hdfc_pos.get("symbol", "")
-        oa_symbol = get_oa_symbol(br_symbol, exchange)
+        oa_symbol = symbols.get((br_symbol, exchange)) if symbols is not None else get_oa_symbol(br_symbol, exchange)
         if not oa_symbol:
             oa_symbol = br_symbol
         
@@ -177,7 +201,7 @@ def map_hdfc_position(hdfc_pos: Dict) -> Dict:
             "symbol": oa_symbol,
             "exchange": exchange,
             "quantity": hdfc_pos.get("quantity", 0),
-            "product": PRODUCT_REVERSE_MAP.get(hdfc_pos.get("product", "MIS"), "MIS"),
+            "product": _get_product_reverse(hdfc_pos.get("product"), "MIS"),
             "price": hdfc_pos.get("average_price", 0),
             "pnl": hdfc_pos.get("pnl", 0),
             "pnl_percentage": hdfc_pos.get("pnl_percentage", 0)
@@ -188,12 +212,12 @@ def map_hdfc_position(hdfc_pos: Dict) -> Dict:
         return hdfc_pos
 
 
-def map_hdfc_holding(hdfc_holding: Dict) -> Dict:
+def map_hdfc_holding(hdfc_holding: Dict, symbols: Optional[Dict] = None) -> Dict:
     """Convert HDFC holding to OpenAlgo format"""
     try:
         exchange = hdfc_holding.get("exchange", "")
         br_symbol = hdfc_holding.get("symbol", "")
-        oa_symbol = get_oa_symbol(br_symbol, exchange)
+        oa_symbol = symbols.get((br_symbol, exchange)) if symbols is not None else get_oa_symbol(br_symbol, exchange)
         if not oa_symbol:
             oa_symbol = br_symbol
         
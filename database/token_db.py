@@ -23,6 +23,7 @@ from database.token_db_enhanced import (
     get_cache_stats,
     get_oa_symbol,
     get_oa_symbol_dbquery,
+    get_oa_symbols_bulk,
     get_symbol,
     get_symbol_count,
     get_symbol_dbquery,
@@ -62,6 +63,7 @@ __all__ = [
     # New functions (won't affect existing code)
     "get_tokens_bulk",
     "get_symbols_bulk",
+    "get_oa_symbols_bulk",
     "search_symbols",
     "load_cache_for_broker",
     "clear_cache",
@@ -361,6 +361,27 @@ class BrokerSymbolCache:
 
         return results
 
+    def get_oa_symbols_bulk(
+        self, brsymbol_exchange_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], str | None]:
+        """
+        Bulk retrieve OpenAlgo symbols for multiple broker symbol-exchange pairs
+        """
+        self.stats.bulk_queries += 1
+        results = {}
+
+        for key in brsymbol_exchange_pairs:
+            if key in results:
+                continue
+            if key in self.by_brsymbol_exchange:
+                results[key] = self.by_brsymbol_exchange[key].symbol
+                self.stats.hits += 1
+            else:
+                results[key] = None
+                self.stats.misses += 1
+
+        return results
+
     def get_symbols_bulk(self, token_exchange_pairs: list[tuple[str, str]]) -> list[str | None]:
         """
         Bulk retrieve symbols for multiple token-exchange pairs
@@ -881,6 +902,54 @@ def get_symbols_bulk(token_exchange_pairs: list[tuple[str, str]]) -> list[str |
     return results
 
 
+def get_oa_symbols_bulk(
+    brsymbol_exchange_pairs: list[tuple[str, str]],
+) -> dict[tuple[str, str], str | None]:
+    """
+    Bulk retrieve OpenAlgo symbols keyed by (brsymbol, exchange)
+    Pairs missing from the cache are resolved with a single database query
+    """
+    cache = get_cache()
+
+    if cache.cache_loaded and cache.is_cache_valid():
+        results = cache.get_oa_symbols_bulk(brsymbol_exchange_pairs)
+    else:
+        results = dict.fromkeys(brsymbol_exchange_pairs)
+
+    missing = [key for key, symbol in results.items() if symbol is None]
+    if missing:
+        cache.stats.db_queries += 1
+        results.update(get_oa_symbols_bulk_dbquery(missing))
+
+    return results
+
+
+def get_oa_symbols_bulk_dbquery(
+    brsymbol_exchange_pairs: list[tuple[str, str]],
+) -> dict[tuple[str, str], str | None]:
+    """Query database for OpenAlgo symbols of many (brsymbol, exchange) pairs at once"""
+    results = dict.fromkeys(brsymbol_exchange_pairs)
+    try:
+        from sqlalchemy import tuple_
+
+        from database.symbol import SymToken
+
+        pairs = list(results)
+        # Chunk to stay well inside database bind-parameter limits
+        for start in range(0, len(pairs), 500):
+            chunk = pairs[start : start + 500]
+            rows = (
+                SymToken.query.with_entities(SymToken.brsymbol, SymToken.exchange, SymToken.symbol)
+                .filter(tuple_(SymToken.brsymbol, SymToken.exchange).in_(chunk))
+                .all()
+            )
+            for brsymbol, exchange, symbol in rows:
+                results[(brsymbol, exchange)] = symbol
+    except Exception as e:
+        logger.exception(f"Error while querying the database: {e}")
+    return results
+
+
 # Search functionality
 def search_symbols(query: str, exchange: str | None = None, limit: int = 50) -> list[dict]:
     """
@@ -0,0 +1,51 @@
+"""
+Tests for the HDFC Investright broker module contract
+The framework imports these functions by name and calls them synchronously
+"""
+
+import inspect
+import os
+import sys
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from broker.hdfc_investright.api import auth_api, data_api, order_api
+
+ENTRY_POINTS = [
+    (order_api, "place_order"),
+    (order_api, "modify_order"),
+    (order_api, "cancel_order"),
+    (order_api, "get_order"),
+    (order_api, "get_order_book"),
+    (order_api, "get_trade_book"),
+    (order_api, "get_positions"),
+    (order_api, "get_holdings"),
+    (order_api, "get_open_position"),
+    (data_api, "get_api_response"),
+    (data_api, "get_quotes"),
+    (data_api, "get_history"),
+    (data_api, "get_depth"),
+    (auth_api, "get_access_token"),
+    (auth_api, "refresh_access_token"),
+    (auth_api, "validate_token"),
+]
+
+
+@pytest.mark.parametrize("module,name", ENTRY_POINTS)
+def test_entry_points_are_blocking(module, name):
+    """Original names stay synchronous; the coroutine lives under <name>_async"""
+    assert not inspect.iscoroutinefunction(getattr(module, name))
+    assert inspect.iscoroutinefunction(getattr(module, f"{name}_async"))
+
+
+def test_get_order_book_returns_dict(monkeypatch):
+    """A blocking call returns the response, not a coroutine"""
+    async def get_orders(auth):
+        return {"orders": []}
+
+    monkeypatch.setattr(order_api, "_get_orders", get_orders)
+
+    assert order_api.get_order_book("token") == {"status": "success", "orders": []}
@@ -0,0 +1,75 @@
+"""
+Tests for the HDFC Investright shared async HTTP client
+Covers timeouts and broker API timing for latency tracking
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+
+from broker.hdfc_investright.api import _client
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    """Serve every request from a MockTransport, keeping the client's hooks"""
+    create_client = _client._create_client
+
+    def handler(request):
+        return httpx.Response(200, json={"path": request.url.path})
+
+    def create_mock_client():
+        client = create_client()
+        client._transport = httpx.MockTransport(handler)
+        return client
+
+    monkeypatch.setattr(_client, "_create_client", create_mock_client)
+    yield
+    # Drop the mock client cached on the background loop
+    _client.run_sync(_client.close_async_client())
+
+
+def test_timeout_allows_large_history_requests():
+    """Matches utils.httpx_client's 120s timeout for historical data"""
+    client = _client._create_client()
+
+    assert client.timeout.read == 120.0
+    assert _client._SYNC_TIMEOUT > client.timeout.read
+
+
+def test_run_sync_reports_broker_api_time(mock_client, monkeypatch):
+    """Response timings from the loop thread are handed back for latency tracking"""
+    recorded = []
+    monkeypatch.setattr(_client, "_record_api_time", lambda api_times: recorded.append(list(api_times)))
+
+    async def fetch():
+        client = await _client.get_async_client()
+        response = await client.get("/orders")
+        return response.json()
+
+    assert _client.run_sync(fetch()) == {"path": "/oapi/v1/orders"}
+    assert len(recorded) == 1
+    assert len(recorded[0]) == 1
+    assert recorded[0][0] >= 0
+
+
+def test_close_async_client_releases_per_loop_client():
+    """Callers on their own loop close the client they were given"""
+    async def main():
+        client = await _client.get_async_client()
+        await _client.close_async_client()
+        reopened = await _client.get_async_client()
+        await _client.close_async_client()
+        return client, reopened
+
+    closed, reopened = asyncio.run(main())
+
+    assert closed.is_closed
+    assert reopened is not closed
+    assert reopened.is_closed
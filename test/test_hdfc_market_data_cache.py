@@ -0,0 +1,109 @@
+"""
+Tests for the HDFC Investright quote and depth caches
+Covers caching only 2xx responses, TTL hits and per-caller copies
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+
+from broker.hdfc_investright.api import _client, data_api
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """Serve /quotes and /depth from a MockTransport and record the requests"""
+    state = {"status": 200, "requests": []}
+
+    def handler(request):
+        state["requests"].append(request.url.path)
+        if state["status"] != 200:
+            return httpx.Response(state["status"], json={"status": "error", "message": "unavailable"})
+        return httpx.Response(200, json={"ltp": 1500.0, "bids": [{"price": 1499.5}]})
+
+    def create_client():
+        return httpx.AsyncClient(base_url="https://broker.test", transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(_client, "_create_client", create_client)
+    data_api.clear_market_data_cache()
+    yield state
+    data_api.clear_market_data_cache()
+
+
+def _run(*calls):
+    """Await each call in order on one loop, closing the loop's client afterwards"""
+    async def main():
+        try:
+            return [await call() for call in calls]
+        finally:
+            await _client.close_async_client()
+
+    return asyncio.run(main())
+
+
+def _quote():
+    return data_api.get_quotes_async("INFY", "NSE", "token")
+
+
+def _depth():
+    return data_api.get_depth_async("INFY", "NSE", "token")
+
+
+@pytest.mark.parametrize("fetch", [_quote, _depth])
+def test_error_response_is_not_cached(broker, fetch):
+    broker["status"] = 503
+
+    first, second = _run(fetch, fetch)
+
+    assert first["status"] == "error"
+    assert second["status"] == "error"
+    assert len(broker["requests"]) == 2
+
+
+@pytest.mark.parametrize("fetch", [_quote, _depth])
+def test_success_is_served_from_cache(broker, fetch):
+    """Within the TTL a repeated call does not reach the broker"""
+    first, second = _run(fetch, fetch)
+
+    assert first == second == {"ltp": 1500.0, "bids": [{"price": 1499.5}]}
+    assert len(broker["requests"]) == 1
+
+
+def test_cache_expires_after_ttl(broker):
+    async def wait_for_ttl():
+        await asyncio.sleep(data_api.DATA_QUOTE_TTL + 0.05)
+
+    _run(_quote, wait_for_ttl, _quote)
+
+    assert broker["requests"] == ["/quotes", "/quotes"]
+
+
+@pytest.mark.parametrize("fetch", [_quote, _depth])
+def test_mutating_result_does_not_change_cache(broker, fetch):
+    async def mutate_then_fetch():
+        result = await fetch()
+        result["ltp"] = 0
+        result["bids"][0]["price"] = 0
+        return await fetch()
+
+    (result,) = _run(mutate_then_fetch)
+
+    assert result == {"ltp": 1500.0, "bids": [{"price": 1499.5}]}
+    assert len(broker["requests"]) == 1
+
+
+def test_concurrent_callers_get_separate_copies(broker):
+    async def concurrent():
+        return await asyncio.gather(_quote(), _quote())
+
+    ((first, second),) = _run(concurrent)
+
+    assert first == second
+    assert first is not second
+    assert first["bids"] is not second["bids"]
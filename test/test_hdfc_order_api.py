@@ -0,0 +1,112 @@
+"""
+Tests for the HDFC Investright order API
+Covers book symbol resolution, open position lookup and the dashboard fan-out
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from broker.hdfc_investright.api import order_api
+from broker.hdfc_investright.mapping import transform_data
+
+HDFC_POSITIONS = [
+    {"symbol": "INFY-EQ", "exchange": "NSE", "product": "MIS", "quantity": 10},
+    {"symbol": "TCS-EQ", "exchange": "NSE", "product": "CNC", "quantity": 5},
+]
+
+
+@pytest.fixture
+def positions_endpoint(monkeypatch):
+    """Serve HDFC_POSITIONS from /positions and count the calls"""
+    calls = []
+
+    async def get_positions(auth):
+        calls.append(auth)
+        return {"positions": [dict(position) for position in HDFC_POSITIONS]}
+
+    monkeypatch.setattr(order_api, "_get_positions", get_positions)
+    return calls
+
+
+@pytest.fixture
+def symbol_lookup(monkeypatch):
+    """Resolve broker symbols without the database, recording the calling thread"""
+    threads = []
+
+    def resolve_oa_symbols(items):
+        threads.append(threading.get_ident())
+        return {(item["symbol"], item["exchange"]): item["symbol"].split("-")[0] for item in items}
+
+    monkeypatch.setattr(transform_data, "resolve_oa_symbols", resolve_oa_symbols)
+    return threads
+
+
+def test_symbol_resolution_runs_off_the_event_loop(positions_endpoint, symbol_lookup):
+    """The bulk symbol lookup may hit the database, so it runs in a worker thread"""
+    async def main():
+        loop_thread = threading.get_ident()
+        response = await order_api.get_positions_async("token")
+        return loop_thread, response
+
+    loop_thread, response = asyncio.run(main())
+
+    assert [position["symbol"] for position in response["positions"]] == ["INFY", "TCS"]
+    assert symbol_lookup and loop_thread not in symbol_lookup
+
+
+def test_open_position_matches_mapped_symbol(positions_endpoint, symbol_lookup):
+    """Positions are matched on the OpenAlgo symbol they were mapped to"""
+    position = order_api.get_open_position("INFY", "NSE", "MIS", "token")
+
+    assert position["symbol"] == "INFY"
+    assert position["quantity"] == 10
+    assert positions_endpoint == ["token"]
+
+
+def test_open_position_not_found(positions_endpoint, symbol_lookup):
+    assert order_api.get_open_position("INFY", "BSE", "MIS", "token") == {}
+    assert order_api.get_open_position("INFY-EQ", "NSE", "MIS", "token") == {}
+
+
+def test_supplied_positions_skip_the_fetch(positions_endpoint, symbol_lookup):
+    """Callers that already hold the position book avoid another round-trip"""
+    positions = [{"symbol": "TCS", "exchange": "NSE", "quantity": 5}]
+
+    position = order_api.get_open_position("TCS", "NSE", "CNC", "token", positions=positions)
+
+    assert position == positions[0]
+    assert positions_endpoint == []
+
+
+def test_dashboard_fetches_all_books_concurrently(monkeypatch, symbol_lookup):
+    """The four account calls are in flight together, not one after another"""
+    in_flight = []
+    peak = []
+
+    def endpoint(key):
+        async def fetch(auth):
+            in_flight.append(key)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.05)
+            in_flight.remove(key)
+            return {key: [{"symbol": "INFY-EQ", "exchange": "NSE"}]}
+        return fetch
+
+    for name, key in [("_get_orders", "orders"), ("_get_trades", "trades"),
+                      ("_get_positions", "positions"), ("_get_holdings", "holdings")]:
+        monkeypatch.setattr(order_api, name, endpoint(key))
+
+    dashboard = order_api.get_dashboard("token")
+
+    assert set(dashboard) == {"orders", "trades", "positions", "holdings"}
+    for key, response in dashboard.items():
+        assert response["status"] == "success"
+        assert response[key][0]["symbol"] == "INFY"
+    assert max(peak) == 4
@@ -0,0 +1,103 @@
+"""
+Tests for the HDFC Investright client-side token bucket
+Covers burst, sustained rate and rate limit setting parsing
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from broker.hdfc_investright.api._ratelimit import (
+    AsyncTokenBucket,
+    _bucket_from_env,
+    _rate_from_env,
+)
+
+
+def _time_acquires(bucket, count):
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(count)])
+        return time.monotonic() - start
+
+    return asyncio.run(main())
+
+
+def test_burst_is_not_delayed():
+    """Up to capacity acquisitions go through immediately"""
+    elapsed = _time_acquires(AsyncTokenBucket(rate=10, capacity=5), 5)
+
+    assert elapsed < 0.05
+
+
+def test_sustained_rate_is_enforced():
+    """Acquisitions beyond the burst are spaced at 1/rate"""
+    # 2 from the burst, then 3 more at 10/s
+    elapsed = _time_acquires(AsyncTokenBucket(rate=10, capacity=2), 5)
+
+    assert 0.25 <= elapsed < 0.5
+
+
+def test_context_manager_acquires():
+    """async with consumes a token"""
+    bucket = AsyncTokenBucket(rate=10, capacity=1)
+
+    async def main():
+        async with bucket:
+            pass
+
+    asyncio.run(main())
+
+    assert bucket._tokens < 1
+
+
+def test_invalid_bucket_rejected():
+    """Non-positive rates and sub-token bursts are rejected"""
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate=-1)
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate=10, capacity=0.5)
+
+
+def test_rate_setting_units(monkeypatch):
+    """Rate settings honour their time unit"""
+    monkeypatch.setenv("HDFC_TEST_RATE", "120 per minute")
+    assert _rate_from_env("HDFC_TEST_RATE", "1 per second") == pytest.approx(2.0)
+
+    monkeypatch.setenv("HDFC_TEST_RATE", "8/second")
+    assert _rate_from_env("HDFC_TEST_RATE", "1 per second") == pytest.approx(8.0)
+
+    monkeypatch.delenv("HDFC_TEST_RATE")
+    assert _rate_from_env("HDFC_TEST_RATE", "5 per second") == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize("value", ["0 per second", "8 per sec", "fast", ""])
+def test_invalid_rate_setting_falls_back(monkeypatch, value):
+    """A bad setting is logged and replaced by the default instead of failing the import"""
+    monkeypatch.setenv("HDFC_TEST_RATE", value)
+    assert _rate_from_env("HDFC_TEST_RATE", "5 per second") == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize("value", ["0", "0.5", "many"])
+def test_invalid_burst_setting_falls_back(monkeypatch, value):
+    monkeypatch.setenv("HDFC_TEST_RATE", "8 per second")
+    monkeypatch.setenv("HDFC_TEST_BURST", value)
+    assert _bucket_from_env("HDFC_TEST_RATE", "HDFC_TEST_BURST", "1 per second").capacity == 8
+
+
+def test_burst_setting(monkeypatch):
+    """Burst defaults to one second of tokens and can be overridden"""
+    monkeypatch.setenv("HDFC_TEST_RATE", "8 per second")
+    monkeypatch.delenv("HDFC_TEST_BURST", raising=False)
+    assert _bucket_from_env("HDFC_TEST_RATE", "HDFC_TEST_BURST", "1 per second").capacity == 8
+
+    monkeypatch.setenv("HDFC_TEST_BURST", "3")
+    assert _bucket_from_env("HDFC_TEST_RATE", "HDFC_TEST_BURST", "1 per second").capacity == 3
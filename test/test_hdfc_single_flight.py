@@ -0,0 +1,107 @@
+"""
+Tests for HDFC Investright request coalescing
+Covers _single_flight sharing, error propagation and leader cancellation
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from broker.hdfc_investright.api.data_api import _inflight, _single_flight
+
+
+def test_concurrent_callers_share_one_fetch():
+    """Callers with the same key get one fetch and the same result"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"ltp": 100}
+
+    async def main():
+        results = await asyncio.gather(*[_single_flight(("/quotes", "INFY"), fetch) for _ in range(5)])
+        assert not _inflight()
+        return results
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert results == [{"ltp": 100}] * 5
+
+
+def test_different_keys_fetch_separately():
+    """Only identical keys are coalesced"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {}
+
+    async def main():
+        await asyncio.gather(
+            _single_flight(("/quotes", "INFY"), fetch),
+            _single_flight(("/quotes", "TCS"), fetch)
+        )
+
+    asyncio.run(main())
+
+    assert len(calls) == 2
+
+
+def test_exception_reaches_every_caller():
+    """A failed fetch raises in the leader and in every waiter"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            *[_single_flight(("/history",), fetch) for _ in range(3)],
+            return_exceptions=True
+        )
+        assert not _inflight()
+        return results
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_leader_cancellation_hands_over_to_waiter():
+    """Cancelling the leader does not cancel waiters; one of them refetches"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"ltp": len(calls)}
+
+    async def main():
+        leader = asyncio.create_task(_single_flight(("/quotes", "INFY"), fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(_single_flight(("/quotes", "INFY"), fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        results = await asyncio.gather(*waiters)
+        assert not _inflight()
+        return results
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 2
+    assert results == [{"ltp": 2}] * 3
@@ -0,0 +1,141 @@
+"""
+Tests for the HDFC Investright in-process token cache
+Covers ratio-based refresh, refresh failure backoff and the refresh lock
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from broker.hdfc_investright.api import auth_api
+
+API_KEY = "test-api-key"
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """Isolated token cache with credentials set and persistence disabled"""
+    monkeypatch.setattr(auth_api, "_ENV", {"api_key": API_KEY, "api_secret": "secret", "redirect_uri": ""})
+    monkeypatch.setattr(auth_api, "_TOKEN_CACHE", {})
+    monkeypatch.setattr(auth_api, "_hydrated", True)
+    monkeypatch.setattr(auth_api, "_persist_token", lambda api_key, entry: None)
+    return auth_api._TOKEN_CACHE
+
+
+def _entry(issued_ago, lifetime, access_token="old-token"):
+    now = time.time()
+    return auth_api.TokenEntry(
+        access_token=access_token,
+        refresh_token="refresh-token",
+        expires_at=now - issued_ago + lifetime,
+        issued_at=now - issued_ago
+    )
+
+
+def _fake_refresh(monkeypatch, calls, succeed=True, delay=0.0):
+    async def refresh_access_token(refresh_token):
+        calls.append(refresh_token)
+        await asyncio.sleep(delay)
+        if not succeed:
+            return None
+        token_response = {"access_token": f"new-token-{len(calls)}", "expires_in": 3600}
+        await auth_api._store_token(API_KEY, token_response)
+        return token_response
+
+    monkeypatch.setattr(auth_api, "refresh_access_token_async", refresh_access_token)
+
+
+def test_fresh_token_is_not_refreshed(token_cache, monkeypatch):
+    """Before TOKEN_REFRESH_RATIO of the lifetime the cached token is served"""
+    calls = []
+    _fake_refresh(monkeypatch, calls)
+    token_cache[API_KEY] = _entry(issued_ago=100, lifetime=3600)
+
+    assert asyncio.run(auth_api.get_valid_access_token_async()) == "old-token"
+    assert calls == []
+
+
+def test_token_past_ratio_is_refreshed(token_cache, monkeypatch):
+    """After TOKEN_REFRESH_RATIO of the lifetime the token is refreshed"""
+    calls = []
+    _fake_refresh(monkeypatch, calls)
+    monkeypatch.setattr(auth_api, "TOKEN_REFRESH_RATIO", 0.5)
+    token_cache[API_KEY] = _entry(issued_ago=2000, lifetime=3600)
+
+    assert asyncio.run(auth_api.get_valid_access_token_async()) == "new-token-1"
+    assert calls == ["refresh-token"]
+    assert token_cache[API_KEY].expires_at == pytest.approx(time.time() + 3600, abs=5)
+
+
+def test_failed_refresh_serves_cached_token_and_backs_off(token_cache, monkeypatch):
+    """A failed refresh keeps the unexpired token and does not retry on every call"""
+    calls = []
+    _fake_refresh(monkeypatch, calls, succeed=False)
+    token_cache[API_KEY] = _entry(issued_ago=2000, lifetime=3600)
+
+    async def main():
+        return [await auth_api.get_valid_access_token_async() for _ in range(5)]
+
+    assert asyncio.run(main()) == ["old-token"] * 5
+    assert len(calls) == 1
+
+    entry = token_cache[API_KEY]
+    assert entry.refresh_failures == 1
+    assert entry.retry_at == pytest.approx(time.time() + auth_api.REFRESH_RETRY_BASE, abs=1)
+
+
+def test_backoff_doubles_and_is_capped(token_cache, monkeypatch):
+    """Consecutive failures double the retry delay up to REFRESH_RETRY_MAX"""
+    calls = []
+    _fake_refresh(monkeypatch, calls, succeed=False)
+    entry = token_cache[API_KEY] = _entry(issued_ago=2000, lifetime=3600)
+
+    delays = []
+    for _ in range(8):
+        entry.retry_at = 0.0
+        asyncio.run(auth_api.get_valid_access_token_async())
+        delays.append(round(entry.retry_at - time.time()))
+
+    assert delays[:3] == [5, 10, 20]
+    assert delays[-1] == auth_api.REFRESH_RETRY_MAX
+
+
+def test_failed_refresh_of_expired_token_returns_none(token_cache, monkeypatch):
+    """Once the access token has expired a failed refresh yields no token"""
+    calls = []
+    _fake_refresh(monkeypatch, calls, succeed=False)
+    token_cache[API_KEY] = _entry(issued_ago=4000, lifetime=3600)
+
+    assert asyncio.run(auth_api.get_valid_access_token_async()) is None
+    assert asyncio.run(auth_api.get_valid_access_token_async()) is None
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("value", ["0", "1", "1.5", "-0.2", "half"])
+def test_invalid_refresh_ratio_falls_back(monkeypatch, value):
+    monkeypatch.setenv("BROKER_REFRESH_RATIO", value)
+    assert auth_api._refresh_ratio() == 0.5
+
+
+def test_valid_refresh_ratio(monkeypatch):
+    monkeypatch.setenv("BROKER_REFRESH_RATIO", "0.8")
+    assert auth_api._refresh_ratio() == 0.8
+
+
+def test_concurrent_callers_share_one_refresh(token_cache, monkeypatch):
+    """N callers hitting an expiring token issue a single refresh POST"""
+    calls = []
+    _fake_refresh(monkeypatch, calls, delay=0.05)
+    token_cache[API_KEY] = _entry(issued_ago=2000, lifetime=3600)
+
+    async def main():
+        return await asyncio.gather(*[auth_api.get_valid_access_token_async() for _ in range(20)])
+
+    assert asyncio.run(main()) == ["new-token-1"] * 20
+    assert len(calls) == 1
@@ -0,0 +1,127 @@
+"""
+Tests for HDFC Investright token persistence
+Covers the token store round-trip and lazy hydration of the auth cache
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# token_store encrypts with auth_db, which needs these at import
+os.environ.setdefault("API_KEY_PEPPER", "0" * 64)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/openalgo.db")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from broker.hdfc_investright.api import auth_api
+from broker.hdfc_investright.database import token_store
+
+API_KEY = "test-api-key"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the token store at an empty SQLite database"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/tokens.db", poolclass=NullPool, connect_args={"check_same_thread": False}
+    )
+    original = token_store.engine
+    token_store.db_session.remove()
+    token_store.db_session.configure(bind=engine)
+    monkeypatch.setattr(token_store, "engine", engine)
+    monkeypatch.setattr(token_store, "_initialized", False)
+    yield token_store
+    token_store.db_session.remove()
+    token_store.db_session.configure(bind=original)
+
+
+@pytest.fixture
+def auth_cache(store, monkeypatch):
+    """Empty, not yet hydrated auth cache"""
+    monkeypatch.setattr(auth_api, "_ENV", {"api_key": API_KEY, "api_secret": "secret", "redirect_uri": ""})
+    monkeypatch.setattr(auth_api, "_TOKEN_CACHE", {})
+    monkeypatch.setattr(auth_api, "_hydrated", False)
+    return auth_api._TOKEN_CACHE
+
+
+def test_round_trip_keeps_absolute_expiry(store):
+    """Saved tokens load back decrypted with the same absolute times"""
+    now = time.time()
+    store.save_token(API_KEY, "access", "refresh", now + 3600, now, now + 86400)
+
+    row = store.HdfcToken.query.filter_by(api_key=API_KEY).first()
+    assert row.access != "access"
+
+    tokens = store.load_tokens()
+    assert tokens[API_KEY] == {
+        "access_token": "access",
+        "refresh_token": "refresh",
+        "expires_at": now + 3600,
+        "issued_at": now,
+        "refresh_expires_at": now + 86400
+    }
+
+
+def test_save_updates_existing_row(store):
+    now = time.time()
+    store.save_token(API_KEY, "access-1", "refresh-1", now + 60, now)
+    store.save_token(API_KEY, "access-2", "refresh-2", now + 120, now)
+
+    assert store.HdfcToken.query.count() == 1
+    assert store.load_tokens()[API_KEY]["access_token"] == "access-2"
+
+
+def test_delete_tokens(store):
+    now = time.time()
+    store.save_token(API_KEY, "access", "refresh", now + 60, now)
+    store.delete_tokens()
+
+    assert store.load_tokens() == {}
+
+
+def test_stored_token_survives_restart(auth_cache):
+    """A token stored by one process is served by the next without refreshing"""
+    asyncio.run(auth_api._store_token(API_KEY, {"access_token": "access", "refresh_token": "refresh", "expires_in": 3600}))
+    expires_at = auth_cache[API_KEY].expires_at
+
+    # Simulate a restart
+    auth_cache.clear()
+    auth_api._hydrated = False
+
+    assert asyncio.run(auth_api.get_valid_access_token_async()) == "access"
+    assert auth_cache[API_KEY].expires_at == expires_at
+
+
+def test_hydration_skips_expired_refresh_tokens(auth_cache, store):
+    now = time.time()
+    store.save_token(API_KEY, "access", "refresh", now - 60, now - 3600, now - 1)
+
+    assert asyncio.run(auth_api.get_valid_access_token_async()) is None
+    assert API_KEY not in auth_cache
+
+
+def test_hydration_keeps_newer_in_process_token(auth_cache, store):
+    """Entries already in the cache are not overwritten by stored ones"""
+    now = time.time()
+    store.save_token(API_KEY, "stored", "refresh", now + 3600, now)
+    auth_cache[API_KEY] = auth_api.TokenEntry("current", "refresh", now + 3600, now)
+
+    assert asyncio.run(auth_api.get_valid_access_token_async()) == "current"
+
+
+def test_import_does_not_touch_store(auth_cache, monkeypatch):
+    """Hydration happens on first use, not at import"""
+    loads = []
+    monkeypatch.setattr(token_store, "load_tokens", lambda: loads.append(1) or {})
+
+    assert loads == []
+    asyncio.run(auth_api.get_valid_access_token_async())
+    asyncio.run(auth_api.get_valid_access_token_async())
+    assert loads == [1]
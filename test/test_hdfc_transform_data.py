@@ -0,0 +1,37 @@
+"""
+Tests for HDFC Investright order field mapping
+Checks map_order_to_hdfc resolves fields exactly as the *_MAP tables do
+"""
+
+import os
+import sys
+
+# Add parent directory to path to import broker modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from broker.hdfc_investright.mapping import transform_data
+
+FIELDS = [
+    ("order_type", transform_data.ORDER_TYPE_MAP, "MKT"),
+    ("product", transform_data.PRODUCT_MAP, "MIS"),
+    ("side", transform_data.SIDE_MAP, "BUY"),
+    ("validity", transform_data.VALIDITY_MAP, "DAY"),
+]
+
+
+@pytest.fixture(autouse=True)
+def no_symbol_db(monkeypatch):
+    monkeypatch.setattr(transform_data, "get_br_symbol", lambda symbol, exchange: symbol)
+
+
+@pytest.mark.parametrize("field,mapping,default", FIELDS)
+def test_fields_match_map_lookup(field, mapping, default):
+    """Known, unknown and missing values map as mapping.get(value, default)"""
+    for value in list(mapping) + ["UNKNOWN", None]:
+        order = {"symbol": "INFY", "exchange": "NSE", "quantity": 1}
+        if value is not None:
+            order[field] = value
+
+        assert transform_data.map_order_to_hdfc(order)[field] == mapping.get(value, default)
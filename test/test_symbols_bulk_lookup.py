@@ -0,0 +1,123 @@
+"""
+Tests for bulk OpenAlgo symbol resolution in token_db
+Covers cache hits, database fallback for misses and query chunking
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.symbol builds its engine at import
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/openalgo.db")
+
+import pytest
+import pytz
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+
+from database import symbol as symbol_db
+from database import token_db_enhanced
+from database.token_db import get_oa_symbols_bulk
+from database.token_db_enhanced import BrokerSymbolCache, SymbolData
+
+
+def _symbol(symbol, brsymbol, exchange):
+    return SymbolData(
+        symbol=symbol, brsymbol=brsymbol, name=symbol, exchange=exchange, brexchange=exchange, token=brsymbol
+    )
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Loaded in-memory symbol cache holding two symbols"""
+    cache = BrokerSymbolCache()
+    for data in (_symbol("INFY", "INFY-EQ", "NSE"), _symbol("TCS", "TCS-EQ", "NSE")):
+        cache.by_brsymbol_exchange[(data.brsymbol, data.exchange)] = data
+    cache.cache_loaded = True
+    cache.next_reset_time = datetime.now(pytz.timezone("Asia/Kolkata")) + timedelta(hours=1)
+    monkeypatch.setattr(token_db_enhanced, "_cache_instance", cache)
+    return cache
+
+
+@pytest.fixture
+def db_queries(monkeypatch):
+    """Record the pairs sent to the database fallback"""
+    queries = []
+
+    def dbquery(pairs):
+        queries.append(list(pairs))
+        return {pair: f"DB:{pair[0]}" if pair[0].startswith("KNOWN") else None for pair in pairs}
+
+    monkeypatch.setattr(token_db_enhanced, "get_oa_symbols_bulk_dbquery", dbquery)
+    return queries
+
+
+def test_cache_hits_skip_database(cache, db_queries):
+    result = get_oa_symbols_bulk([("INFY-EQ", "NSE"), ("TCS-EQ", "NSE"), ("INFY-EQ", "NSE")])
+
+    assert result == {("INFY-EQ", "NSE"): "INFY", ("TCS-EQ", "NSE"): "TCS"}
+    assert db_queries == []
+
+
+def test_misses_resolved_in_one_database_query(cache, db_queries):
+    result = get_oa_symbols_bulk([("INFY-EQ", "NSE"), ("KNOWN-1", "NSE"), ("UNKNOWN", "BSE")])
+
+    assert result == {
+        ("INFY-EQ", "NSE"): "INFY",
+        ("KNOWN-1", "NSE"): "DB:KNOWN-1",
+        ("UNKNOWN", "BSE"): None
+    }
+    assert db_queries == [[("KNOWN-1", "NSE"), ("UNKNOWN", "BSE")]]
+
+
+def test_unloaded_cache_falls_back_to_database(cache, db_queries):
+    cache.cache_loaded = False
+
+    result = get_oa_symbols_bulk([("INFY-EQ", "NSE"), ("KNOWN-2", "NSE")])
+
+    assert result == {("INFY-EQ", "NSE"): None, ("KNOWN-2", "NSE"): "DB:KNOWN-2"}
+    assert db_queries == [[("INFY-EQ", "NSE"), ("KNOWN-2", "NSE")]]
+
+
+@pytest.fixture
+def symtoken_db(tmp_path):
+    """Point SymToken at an empty SQLite database"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/symbols.db", poolclass=NullPool, connect_args={"check_same_thread": False}
+    )
+    symbol_db.Base.metadata.create_all(engine)
+    original = symbol_db.db_session.get_bind()
+    symbol_db.db_session.remove()
+    symbol_db.db_session.configure(bind=engine)
+    yield engine
+    symbol_db.db_session.remove()
+    symbol_db.db_session.configure(bind=original)
+
+
+def test_database_query_is_chunked(symtoken_db):
+    """Large lookups are split into chunks of 500 pairs"""
+    symbol_db.db_session.add_all(
+        symbol_db.SymToken(symbol=f"SYM{i}", brsymbol=f"BR{i}", exchange="NSE", token=str(i))
+        for i in range(1200)
+    )
+    symbol_db.db_session.commit()
+
+    selects = []
+
+    @event.listens_for(symtoken_db, "before_cursor_execute")
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    pairs = [(f"BR{i}", "NSE") for i in range(1200)] + [("MISSING", "NSE")]
+    result = token_db_enhanced.get_oa_symbols_bulk_dbquery(pairs)
+
+    assert len(selects) == 3
+    assert result[("BR0", "NSE")] == "SYM0"
+    assert result[("BR1199", "NSE")] == "SYM1199"
+    assert result[("MISSING", "NSE")] is None
+    assert len(result) == 1201